@@ -1,11 +1,5 @@
 # An intake and intake-esm inpsired catalog for ESGF
 
-import warnings
-
-import xarray as xr
-
-warnings.simplefilter("ignore", category=xr.SerializationWarning)
-
 
 def in_notebook() -> bool:
     """Check if the code is running in a jupyter notebook"""
@@ -3,13 +3,13 @@
 import hashlib
 import re
 import time
+from collections.abc import Iterator
 from functools import partial
 from pathlib import Path
-from typing import Any, Literal, Union
+from typing import TYPE_CHECKING, Any, Literal, Union
 
 import pandas as pd
 import requests
-import xarray as xr
 
 import intake_esgf
 from intake_esgf.database import (
@@ -19,11 +19,16 @@ from intake_esgf.database import (
 )
 from intake_esgf.exceptions import NoSearchResults
 
+if TYPE_CHECKING:
+    import xarray as xr
+
 if intake_esgf.IN_NOTEBOOK:
     from tqdm import tqdm_notebook as tqdm
 else:
     from tqdm import tqdm
 
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024  # [B]
+
 bar_format = "{desc:>20}: {percentage:3.0f}%|{bar}|{n_fmt}/{total_fmt} [{rate_fmt:>15s}{postfix}]"
 
 
@@ -34,6 +39,7 @@ def combine_results(dfs: list[pd.DataFrame]) -> pd.DataFrame:
     df = pd.concat(dfs)
     if len(df) == 0:
         logger.info("\x1b[36;32msearch end \x1b[91;20mno results\033[0m")
+        intake_esgf.conf.flush_logger()
         raise NoSearchResults()
     combine_time = time.time()
     variable_facet = get_facet_by_type(df, "variable")
@@ -46,23 +52,19 @@ def combine_results(dfs: list[pd.DataFrame]) -> pd.DataFrame:
         df = df.drop(grp.iloc[1:].index)
         df.loc[grp.index[0], "id"] = grp.id.to_list()
     df = df.drop(columns="data_node")
+    # facet values repeat many times, so we store them as categories
+    for col in df.columns:
+        if col not in ["version", "id"]:
+            df[col] = df[col].astype("category")
     combine_time = time.time() - combine_time
     logger.info(f"{combine_time=:.2f}")
     return df
 
 
-def get_file_hash(filepath: Union[str, Path], algorithm: str) -> str:
-    """Get the file has using the given algorithm."""
-    algorithm = algorithm.lower()
-    assert algorithm in hashlib.algorithms_available
-    sha = hashlib.__dict__[algorithm]()
-    with open(filepath, "rb") as fp:
-        while True:
-            data = fp.read(64 * 1024)
-            if not data:
-                break
-            sha.update(data)
-    return sha.hexdigest()
+def batched(values: list[Any], size: int) -> Iterator[list[Any]]:
+    """Yield successive lists of at most `size` values."""
+    for i in range(0, len(values), size):
+        yield values[i : i + size]
 
 
 def download_and_verify(
@@ -74,7 +76,12 @@ def download_and_verify(
     download_db: Path,
     quiet: bool = False,
 ) -> None:
-    """Download the url to a local file and check for validity, removing if not."""
+    """Download the url to a local file and check for validity, removing if not.
+
+    The hash is computed on the chunks as they are written so that the file need not
+    be read back from disk.
+
+    """
     logger = intake_esgf.conf.get_logger()
     if not isinstance(local_file, Path):
         local_file = Path(local_file)
@@ -84,6 +91,9 @@ def download_and_verify(
         if len(local_file.name) < max_file_length
         else f"{local_file.name[:(max_file_length-3)]}..."
     )
+    hash_algorithm = hash_algorithm.lower()
+    assert hash_algorithm in hashlib.algorithms_available
+    sha = hashlib.new(hash_algorithm)
     local_file.parent.mkdir(parents=True, exist_ok=True)
     resp = requests.get(url, stream=True, timeout=10)
     resp.raise_for_status()
@@ -99,13 +109,14 @@ def download_and_verify(
             ascii=False,
             leave=False,
         ) as pbar:
-            for chunk in resp.iter_content(chunk_size=1024):
+            for chunk in resp.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
                 if chunk:
                     fdl.write(chunk)
+                    sha.update(chunk)
                     pbar.update(len(chunk))
     transfer_time = time.time() - transfer_time
     rate = content_length * 1e-6 / transfer_time
-    if get_file_hash(local_file, hash_algorithm) != hash:
+    if sha.hexdigest() != hash:
         logger.info(f"\x1b[91;20mHash error\033[0m {url}")
         local_file.unlink()
         raise ValueError("Hash does not match")
@@ -159,7 +170,7 @@ def parallel_download(
     return None, None
 
 
-def get_search_criteria(ds: xr.Dataset) -> dict[str, str]:
+def get_search_criteria(ds: "xr.Dataset") -> dict[str, str]:
     """Return a dictionary of facet information from the dataset attributes."""
     keys = [
         "activity_id",
@@ -178,7 +189,7 @@ def get_search_criteria(ds: xr.Dataset) -> dict[str, str]:
     return search
 
 
-def add_variable(variable_id: str, ds: xr.Dataset, catalog) -> xr.Dataset:
+def add_variable(variable_id: str, ds: "xr.Dataset", catalog) -> "xr.Dataset":
     """Search for and add the specified variable to the input dataset.
 
     This function is intended to be used to add cell measures such as `areacella` and
@@ -195,6 +206,8 @@ def add_variable(variable_id: str, ds: xr.Dataset, catalog) -> xr.Dataset:
         The ESGFCatalog instance to use to perform the search. This will be cloned so
         that any current search is not altered.
     """
+    import xarray as xr
+
     cat = catalog.clone()  # so we do not interfere with the current search
 
     search = get_search_criteria(ds)
@@ -234,7 +247,7 @@ def add_variable(variable_id: str, ds: xr.Dataset, catalog) -> xr.Dataset:
     return ds
 
 
-def add_cell_measures(ds: xr.Dataset, catalog) -> xr.Dataset:
+def add_cell_measures(ds: "xr.Dataset", catalog) -> "xr.Dataset":
     """Search the catalog for variables needed by the cell measures/methods.
 
     Parameters
@@ -273,7 +286,7 @@ def add_cell_measures(ds: xr.Dataset, catalog) -> xr.Dataset:
     return ds
 
 
-def get_cell_measure(var: str, ds: xr.Dataset) -> Union[xr.DataArray, None]:
+def get_cell_measure(var: str, ds: "xr.Dataset") -> Union["xr.DataArray", None]:
     """Return the dataarray of the measures required by the given var.
 
     This routine will examine the `cell_measures` attribute of the specified `var` as
@@ -396,6 +409,30 @@ def get_facet_by_type(
     return facet[0]
 
 
+def get_variant_integers(variants: pd.Series) -> pd.DataFrame:
+    """Return the integer values found in the variants as columns of a dataframe.
+
+    Variant labels such as `r1i1p1f1` are not sorted correctly as strings. We find the
+    pattern of text and integers in the first variant, assume that it is representative
+    of the whole, and extract the integers of each unique variant only once.
+
+    """
+    sample = variants.iloc[0]
+    ints = re.findall(r"\d+", sample)
+    match = re.match("".join([rf"(\S+){i}" for i in ints]), sample)
+    if not match:
+        raise ValueError("Failed to find the pattern")
+    int_pattern = re.compile("".join([rf"{s}(\d+)" for s in match.groups()]))
+    unique_ints = {}
+    for variant in variants.unique():
+        match = int_pattern.search(variant)
+        if not match:
+            raise ValueError(f"Variant '{variant}' does not match the pattern")
+        unique_ints[variant] = [int(i) for i in match.groups()]
+    unique_ints = pd.DataFrame.from_dict(unique_ints, orient="index")
+    return unique_ints.reindex(variants.to_numpy()).set_index(variants.index)
+
+
 def get_content_path(content: dict[str, Any]) -> Path:
     """Get the local path where the data is to be stored.
 
@@ -1,18 +1,21 @@
 """The primary object in intake-esgf."""
 
+import json
 import re
 import time
 import warnings
+from collections import Counter, OrderedDict
 from functools import partial
+from multiprocessing import Pool
 from multiprocessing.pool import ThreadPool
 from pathlib import Path
-from typing import Any, Callable, Literal, Union
+from threading import Lock
+from typing import TYPE_CHECKING, Any, Callable, Literal, Union
 
 import pandas as pd
 import requests
-import xarray as xr
-from globus_sdk import TransferAPIError, TransferData
-from numpy import argmax
+from globus_sdk import GlobusAPIError, NetworkError, TransferAPIError, TransferData
+from numpy import argmax, asarray
 
 import intake_esgf
 from intake_esgf import IN_NOTEBOOK
@@ -21,23 +24,61 @@ from intake_esgf.base import (
     bar_format,
     combine_results,
     get_facet_by_type,
+    get_variant_integers,
     parallel_download,
 )
 from intake_esgf.core import GlobusESGFIndex, SolrESGFIndex
 from intake_esgf.core.globus import get_authorized_transfer_client, variable_info
 from intake_esgf.database import (
+    cache_file_info,
+    clear_file_info,
     create_download_database,
+    create_file_info_table,
+    get_cached_file_info,
     get_download_rate_dataframe,
     log_download_information,
     sort_globus_endpoints,
 )
-from intake_esgf.exceptions import LocalCacheNotWritable, NoSearchResults
+from intake_esgf.exceptions import LocalCacheNotWritable, NoSearchResults, SearchError
 
 if IN_NOTEBOOK:
     from tqdm import tqdm_notebook as tqdm
 else:
     from tqdm import tqdm
 
+if TYPE_CHECKING:
+    import xarray as xr
+
+# An index raising one of these did not respond, we warn and use the other indices
+INDEX_ERRORS = (requests.exceptions.RequestException, GlobusAPIError, NetworkError)
+
+# Search responses are cached per index for a short time so that repeating a search,
+# as is common when refining it interactively, does not requery the indices.
+SEARCH_CACHE_SIZE = 128
+SEARCH_CACHE_TTL = 300  # [s]
+_search_cache = OrderedDict()
+_search_cache_lock = Lock()
+
+
+def _search_cache_key(index, search: dict[str, Any]) -> tuple:
+    """Return a hashable key for the search of an index."""
+    return (
+        repr(index),
+        tuple(
+            sorted(
+                (key, tuple(val) if isinstance(val, list) else val)
+                for key, val in search.items()
+            )
+        ),
+    )
+
+
+def _find_incomplete(
+    complete: Callable[[pd.DataFrame], bool], groups: list[pd.DataFrame]
+) -> list:
+    """Return the index of the rows in the groups which are not complete."""
+    return [ind for grp in groups if not complete(grp) for ind in grp.index]
+
 
 class ESGFCatalog:
     """A data catalog for searching ESGF nodes and downloading data.
@@ -55,7 +96,8 @@ class ESGFCatalog:
         A pandas dataframe into which the results from the search are parsed. Once you
         are satisfied with the datasets listed in this dataframe, calling
         `to_dataset_dict()` will then requery the indices to obtain file information and
-        then download files in parallel.
+        then download files in parallel. After a `search(shallow=True)` this is `None`
+        until an operation requiring the records is performed.
     last_search: dict
         The keywords and values used in the previous call to `search()`.
     session_time : pd.Timestamp
@@ -78,6 +120,7 @@ class ESGFCatalog:
         if not self.indices:
             raise ValueError("You must have at least 1 search index configured")
         self.df = None
+        self._facet_counts = None
         self.session_time = pd.Timestamp.now()
         self.last_search = {}
         self.local_cache = []
@@ -87,6 +130,9 @@ class ESGFCatalog:
 
     def __repr__(self):
         """Return the unique facets and values from the search."""
+        if self._facet_counts is not None:
+            repr = "Summary information for a shallow search:\n"
+            return repr + self.unique().__repr__()
         if self.df is None:
             return "Perform a search() to populate the catalog."
         repr = f"Summary information for {len(self.df)} results:\n"
@@ -131,6 +177,7 @@ class ESGFCatalog:
         download_db.parent.mkdir(parents=True, exist_ok=True)
         if not download_db.is_file():
             create_download_database(download_db)
+        create_file_info_table(download_db)
         self.download_db = download_db
 
     def clone(self):
@@ -148,39 +195,47 @@ class ESGFCatalog:
 
     def unique(self) -> pd.Series:
         """Return the the unique values in each facet of the search."""
+        if self._facet_counts is not None:
+            return pd.Series(
+                {facet: list(counts) for facet, counts in self._facet_counts.items()}
+            )
         out = {}
         for col in self.df.drop(columns=["id", "version"]).columns:
-            out[col] = self.df[col].unique()
+            out[col] = asarray(self.df[col].unique())
         return pd.Series(out)
 
+    def _model_group_facets(self) -> list[str]:
+        """Return the facets which define a model group in the current search."""
+        group = [
+            get_facet_by_type(self.df, "model"),
+            get_facet_by_type(self.df, "variant"),
+        ]
+        try:
+            group.append(get_facet_by_type(self.df, "grid"))
+        except ValueError:
+            pass
+        return group
+
+    def _materialize(self, quiet: bool = False):
+        """Perform the full search if only a shallow search has been performed."""
+        if self._facet_counts is not None:
+            self.search(quiet=quiet, **self.last_search)
+
     def model_groups(self) -> pd.Series:
         """Return counts for unique combinations of (source_id,member_id,grid_label)."""
-
-        def _extract_int_pattern(sample: str) -> str:
-            ints = re.findall(r"\d+", sample)
-            match = re.match("".join([rf"(\S+){i}" for i in ints]), sample)
-            if not match:
-                raise ValueError("Failed to find the pattern")
-            return "".join([rf"{s}(\d+)" for s in match.groups()])
+        self._materialize()
 
         # sort by the lower-case version of the 'model' name
         model_facet = get_facet_by_type(self.df, "model")
         lower = self.df[model_facet].str.lower()
         lower.name = "lower"
 
-        # sort the variants but extract out the integer values, assume the first result
-        # is representative of the whole
+        # sort the variants but extract out the integer values
         variant_facet = get_facet_by_type(self.df, "variant")
-        int_pattern = _extract_int_pattern(self.df.iloc[0][variant_facet])
 
         # add in these new data to a temporary dataframe
         df = pd.concat(
-            [
-                self.df,
-                lower,
-                self.df[variant_facet].str.extract(int_pattern).astype(int),
-            ],
-            axis=1,
+            [self.df, lower, get_variant_integers(self.df[variant_facet])], axis=1
         )
 
         # what columns will we sort/drop/groupby
@@ -197,35 +252,82 @@ class ESGFCatalog:
         return (
             df.sort_values(sort_columns)
             .drop(columns=added_columns)
-            .groupby(group_columns, sort=False)
+            .groupby(group_columns, sort=False, observed=True)
             .count()
             .iloc[:, 0]
         )
 
-    def search(self, quiet: bool = False, **search: Union[str, list[str]]):
+    def search(
+        self,
+        quiet: bool = False,
+        shallow: bool = False,
+        require_variables: Union[list[str], None] = None,
+        either_variables: Union[list[str], None] = None,
+        **search: Union[str, list[str]],
+    ):
         """Populate the catalog by specifying search facets and values.
 
         Parameters
         ----------
         quiet
             Enable to silence the progress bar.
+        shallow
+            Enable to only retrieve the unique facet values of the search and not the
+            records themselves. This is much faster for large searches and useful when
+            refining the search. The records are retrieved automatically once they are
+            needed, for example when calling `to_dataset_dict()`.
+        require_variables
+            Only keep the model groups which have all of these variables. The variables
+            are added to the search and incomplete model groups removed as in
+            `remove_incomplete_variables()`.
+        either_variables
+            Only keep the model groups which have at least one of these variables.
         search
             Any number of facet keywords and values.
 
         """
         logger = intake_esgf.conf.get_logger()
 
+        def _facet_counts(index):
+            try:
+                counts = index.facet_counts(**search)
+            except NoSearchResults:
+                return {}
+            except INDEX_ERRORS:
+                logger.info(f"└─{index} \x1b[91;20mno response\033[0m")
+                warnings.warn(
+                    f"{index} failed to return a response, results may be incomplete"
+                )
+                return {}
+            return counts
+
         def _search(index):
+            key = _search_cache_key(index, search)
+            with _search_cache_lock:
+                if key in _search_cache:
+                    cache_time, df = _search_cache[key]
+                    if (time.time() - cache_time) < SEARCH_CACHE_TTL:
+                        _search_cache.move_to_end(key)
+                        logger.info(f"└─{index} results={len(df)} cached")
+                        return df.copy()
+                    _search_cache.pop(key)
+            response_time = time.time()
             try:
                 df = index.search(**search)
             except NoSearchResults:
-                return pd.DataFrame([])
-            except requests.exceptions.RequestException:
+                df = pd.DataFrame([])
+            except INDEX_ERRORS:
                 logger.info(f"└─{index} \x1b[91;20mno response\033[0m")
                 warnings.warn(
                     f"{index} failed to return a response, results may be incomplete"
                 )
                 return pd.DataFrame([])
+            response_time = time.time() - response_time
+            logger.info(f"└─{index} results={len(df)} {response_time=:.2f}")
+            with _search_cache_lock:
+                _search_cache[key] = (time.time(), df.copy())
+                if len(_search_cache) > SEARCH_CACHE_SIZE:
+                    _search_cache.popitem(last=False)
             return df
 
         # drop empty search fields
@@ -248,6 +350,28 @@ class ESGFCatalog:
             if len(search["project"]) > 1:
                 raise ValueError("For now, projects may only be searched one at a time")
 
+        # the indices cannot express that a model group must have several variables, so
+        # we only search for those variables and remove incomplete groups afterwards
+        if require_variables or either_variables:
+            if shallow:
+                raise SearchError(
+                    "Variable requirements cannot be used with a shallow search"
+                )
+            project = (
+                search["project"][0]
+                if isinstance(search["project"], list)
+                else search["project"]
+            )
+            variable_facet = "variable_id"
+            if "variable" in search or project in ["CMIP5", "CMIP3"]:
+                variable_facet = "variable"
+            variables = search.get(variable_facet, [])
+            variables = [variables] if isinstance(variables, str) else list(variables)
+            for variable in (require_variables or []) + (either_variables or []):
+                if variable not in variables:
+                    variables.append(variable)
+            search[variable_facet] = variables
+
         # log what is being searched for
         search_str = ", ".join(
             [
@@ -257,31 +381,85 @@ class ESGFCatalog:
         )
         logger.info(f"\x1b[36;32msearch begin\033[0m {search_str}")
 
+        # only count the facet values, counts include replicas across indices
+        if shallow:
+            search_time = time.time()
+            facet_counts = {}
+            with ThreadPool(len(self.indices)) as pool:
+                for counts in tqdm(
+                    pool.imap_unordered(_facet_counts, self.indices),
+                    disable=quiet,
+                    bar_format=bar_format,
+                    unit="index",
+                    unit_scale=False,
+                    desc="Searching indices",
+                    ascii=False,
+                    total=len(self.indices),
+                ):
+                    for facet, values in counts.items():
+                        facet_counts.setdefault(facet, Counter()).update(values)
+            if not facet_counts:
+                logger.info("\x1b[36;32msearch end \x1b[91;20mno results\033[0m")
+                intake_esgf.conf.flush_logger()
+                raise NoSearchResults()
+            search_time = time.time() - search_time
+            logger.info(f"\x1b[36;32msearch end\033[0m shallow {search_time=:.2f}")
+            intake_esgf.conf.flush_logger()
+            self.df = None
+            self._facet_counts = facet_counts
+            self.last_search = search
+            return self
+
         # threaded search over indices
         search_time = time.time()
-        dfs = ThreadPool(len(self.indices)).imap_unordered(_search, self.indices)
-        self.df = combine_results(
-            tqdm(
-                dfs,
-                disable=quiet,
-                bar_format=bar_format,
-                unit="index",
-                unit_scale=False,
-                desc="Searching indices",
-                ascii=False,
-                total=len(self.indices),
+        with ThreadPool(len(self.indices)) as pool:
+            self.df = combine_results(
+                tqdm(
+                    pool.imap_unordered(_search, self.indices),
+                    disable=quiet,
+                    bar_format=bar_format,
+                    unit="index",
+                    unit_scale=False,
+                    desc="Searching indices",
+                    ascii=False,
+                    total=len(self.indices),
+                )
             )
-        )
 
         # even though we are using latest=True, because the search is distributed, we
         # may have different versions.
-        for r, row in self.df.iterrows():
-            latest = max([x.split("|")[0].split(".")[-1] for x in row.id])
-            self.df.loc[r, "id"] = [x for x in row.id if latest in x]
+        def _latest_ids(ids: list[str]) -> list[str]:
+            latest = max([x.split("|")[0].split(".")[-1] for x in ids])
+            return [x for x in ids if latest in x]
+
+        self.df["id"] = [_latest_ids(ids) for ids in self.df["id"]]
+        self._facet_counts = None
+        self.last_search = search
+        if require_variables or either_variables:
+            self.remove_incomplete_variables(
+                require_variables or [], either=either_variables
+            )
+            if not len(self.df):
+                logger.info("\x1b[36;32msearch end \x1b[91;20mno results\033[0m")
+                intake_esgf.conf.flush_logger()
+                raise NoSearchResults()
 
         search_time = time.time() - search_time
         logger.info(f"\x1b[36;32msearch end\033[0m total_time={search_time:.2f}")
-        self.last_search = search
+        intake_esgf.conf.flush_logger()
+        return self
+
+    def clear_cache(self):
+        """Clear the cached responses so that the indices are queried again.
+
+        Search responses are cached for a few minutes and shared by all catalogs. File
+        information is cached on disk for a week. If you expect that the indices have
+        changed in this time, clear the cache before searching.
+
+        """
+        with _search_cache_lock:
+            _search_cache.clear()
+        clear_file_info(self.download_db)
         return self
 
     def from_tracking_ids(
@@ -308,7 +486,7 @@ class ESGFCatalog:
                 df = index.from_tracking_ids(tracking_ids)
             except NoSearchResults:
                 return pd.DataFrame([])
-            except requests.exceptions.RequestException:
+            except INDEX_ERRORS:
                 logger.info(f"└─{index} \x1b[91;20mno response\033[0m")
                 warnings.warn(
                     f"{index} failed to return a response, results may be incomplete"
@@ -324,27 +502,27 @@ class ESGFCatalog:
 
         # threaded search over indices
         search_time = time.time()
-        dfs = ThreadPool(len(self.indices)).imap_unordered(
-            _from_tracking_ids, self.indices
-        )
-        self.df = combine_results(
-            tqdm(
-                dfs,
-                disable=quiet,
-                bar_format=bar_format,
-                unit="index",
-                unit_scale=False,
-                desc="Searching indices",
-                ascii=False,
-                total=len(self.indices),
+        with ThreadPool(len(self.indices)) as pool:
+            self.df = combine_results(
+                tqdm(
+                    pool.imap_unordered(_from_tracking_ids, self.indices),
+                    disable=quiet,
+                    bar_format=bar_format,
+                    unit="index",
+                    unit_scale=False,
+                    desc="Searching indices",
+                    ascii=False,
+                    total=len(self.indices),
+                )
             )
-        )
         search_time = time.time() - search_time
+        self._facet_counts = None
         if len(self.df) != len(tracking_ids):
             logger.info("One or more of the tracking_ids resolve to multiple files.")
         logger.info(
             f"\x1b[36;32mfrom_tracking_ids end\033[0m total_time={search_time:.2f}"
         )
+        intake_esgf.conf.flush_logger()
 
         return self
 
@@ -358,7 +536,8 @@ class ESGFCatalog:
                 info = index.get_file_info(list(dataset_ids.keys()), **search_facets)
             except NoSearchResults:
                 return []
-            except requests.exceptions.RequestException:
+            except INDEX_ERRORS:
+                failed.append(index)
                 logger.info(f"└─{index} \x1b[91;20mno response\033[0m")
                 warnings.warn(
                     f"{index} failed to return a response, info may be incomplete"
@@ -369,26 +548,55 @@ class ESGFCatalog:
         logger = intake_esgf.conf.get_logger()
         logger.info("\x1b[36;32mfile info begin\033[0m")
 
-        # threaded file info over indices and flatten output
+        # file information of datasets we have seen recently is cached on disk, keyed
+        # also by the indices so that changing them does not return stale links
         info_time = time.time()
-        get_file_info = ThreadPool(len(self.indices)).imap_unordered(
-            partial(_get_file_info, dataset_ids=dataset_ids, **search_facets),
-            self.indices,
-        )
-        index_infos = list(
-            tqdm(
-                get_file_info,
-                disable=quiet,
-                bar_format=bar_format,
-                unit="index",
-                unit_scale=False,
-                desc="Get file information",
-                ascii=False,
-                total=len(self.indices),
-            )
+        query = json.dumps(
+            dict(
+                indices=sorted(repr(index) for index in self.indices), **search_facets
+            ),
+            sort_keys=True,
         )
+        cached_infos = get_cached_file_info(self.download_db, list(dataset_ids), query)
+        logger.info(f"└─file info cached for {len(cached_infos)} datasets")
+        missing = {
+            dataset_id: key
+            for dataset_id, key in dataset_ids.items()
+            if dataset_id not in cached_infos
+        }
+
+        # threaded file info over indices and flatten output
+        index_infos = []
+        failed = []
+        if missing:
+            with ThreadPool(len(self.indices)) as pool:
+                index_infos = list(
+                    tqdm(
+                        pool.imap_unordered(
+                            partial(
+                                _get_file_info, dataset_ids=missing, **search_facets
+                            ),
+                            self.indices,
+                        ),
+                        disable=quiet,
+                        bar_format=bar_format,
+                        unit="index",
+                        unit_scale=False,
+                        desc="Get file information",
+                        ascii=False,
+                        total=len(self.indices),
+                    )
+                )
         index_infos = [info for index_info in index_infos for info in index_info]
 
+        # only cache if all indices responded, else the information may be incomplete
+        if not failed:
+            new_infos = {}
+            for info in index_infos:
+                new_infos.setdefault(info["dataset_id"], []).append(info)
+            cache_file_info(self.download_db, new_infos, query)
+        index_infos += [info for infos in cached_infos.values() for info in infos]
+
         # now we merge this info together.
         def _which_key(path, keys):
             """Return the key that is likely correct based on counts in the path."""
@@ -410,18 +618,19 @@ class ESGFCatalog:
                 else:
                     merged_info[path] = {"key": dataset_ids[info["dataset_id"]]}
 
+            # replicas of a file may be reported by several indices, only keep unique
+            # links so each is tried at most once when downloading
             for key, val in info.items():
                 if isinstance(val, list):
-                    if key not in merged_info[path]:
-                        merged_info[path][key] = val
-                    else:
-                        merged_info[path][key] += val
+                    merged = merged_info[path].get(key, []) + val
+                    merged_info[path][key] = list(dict.fromkeys(merged))
                 else:
                     if key not in merged_info[path]:
                         merged_info[path][key] = val
         infos = [info for _, info in merged_info.items()]
         info_time = time.time() - info_time
         logger.info(f"\x1b[36;32mfile info end\033[0m total_time={info_time:.2f}")
+        intake_esgf.conf.flush_logger()
         return infos
 
     def _partition_infos(self, infos: list[dict]) -> tuple[list, dict]:
@@ -539,6 +748,7 @@ class ESGFCatalog:
                 task_doc = transfer_client.submit_transfer(task_data)
                 logger.info(f"└─ {task_doc['task_id']}")
                 tasks.append(task_doc)
+        intake_esgf.conf.flush_logger()  # users may look up the task_ids in the log
 
         # download in parallel using threads
         results = []
@@ -559,6 +769,7 @@ class ESGFCatalog:
             while True:
                 response = transfer_client.get_task(task_doc["task_id"])
                 logger.info(f"task_id {task_doc['task_id']} {response.data['status']}")
+                intake_esgf.conf.flush_logger()
                 if response.data["status"] == "SUCCEEDED":
                     log_download_information(
                         self.download_db,
@@ -586,6 +797,7 @@ class ESGFCatalog:
                 results.append(_find_local_file(info))
 
         logger.info("\x1b[36;32mend move_data\033[0m")
+        intake_esgf.conf.flush_logger()
         return results
 
     def to_dataset_dict(
@@ -599,7 +811,7 @@ class ESGFCatalog:
         globus_endpoint: Union[str, None] = None,
         globus_path: Union[Path, None] = None,
         operators: list[Any] = [],
-    ) -> dict[str, xr.Dataset]:
+    ) -> dict[str, "xr.Dataset"]:
         """Return the current search as a dictionary of datasets.
 
         By default, the keys of the returned dictionary are the minimal set of facets
@@ -618,12 +830,15 @@ class ESGFCatalog:
         num_threads
             The number of threads to use when downloading files.
         """
+        import xarray as xr
+
+        warnings.simplefilter("ignore", category=xr.SerializationWarning)
+        self._materialize(quiet=quiet)
         if self.df is None or len(self.df) == 0:
             raise ValueError("No entries to retrieve.")
 
         # The keys of the returned dictionary should only consist of the facets that are
         # different.
-        output_key_format = []
         if ignore_facets is None:
             ignore_facets = []
         if isinstance(ignore_facets, str):
@@ -633,22 +848,29 @@ class ESGFCatalog:
             "version",
             "id",
         ]
-        for col in self.df.drop(columns=ignore_facets):
-            if minimal_keys:
-                if not (self.df[col].iloc[0] == self.df[col]).all():
-                    output_key_format.append(col)
-            else:
-                output_key_format.append(col)
+        facets = self.df.drop(columns=ignore_facets)
+        if minimal_keys:
+            num_unique = facets.nunique(dropna=False)
+            output_key_format = num_unique[num_unique > 1].index.to_list()
+        else:
+            output_key_format = facets.columns.to_list()
         if not output_key_format:  # at minimum we have the variable id as a key
             output_key_format = [get_facet_by_type(self.df, "variable")]
 
         # Populate a dictionary of dataset_ids in this search and which keys they will
         # map to in the output dictionary. This is complicated by CMIP5 where the
         # dataset_id -> variable mapping is not unique.
+        keys = (
+            self.df[output_key_format[0]]
+            .astype(str)
+            .str.cat(
+                [self.df[col].astype(str) for col in output_key_format[1:]],
+                sep=separator,
+            )
+        )
         dataset_ids = {}
-        for _, row in self.df.iterrows():
-            key = separator.join([row[k] for k in output_key_format])
-            for dataset_id in row["id"]:
+        for key, ids in zip(keys.to_list(), self.df["id"].to_list()):
+            for dataset_id in ids:
                 if dataset_id in dataset_ids:
                     if isinstance(dataset_ids[dataset_id], str):
                         dataset_ids[dataset_id] = [dataset_ids[dataset_id]]
@@ -708,7 +930,9 @@ class ESGFCatalog:
             ds = op(ds)
         return ds
 
-    def remove_incomplete(self, complete: Callable[[pd.DataFrame], bool]):
+    def remove_incomplete(
+        self, complete: Callable[[pd.DataFrame], bool], num_processes: int = 1
+    ):
         """Remove the incomplete search results as defined by the `complete` function.
 
         While the ESGF search results will return anything matching the criteria, we are
@@ -719,18 +943,72 @@ class ESGFCatalog:
         user-provided `complete` function on the grouped dataframe and remove entries
         deemed incomplete.
 
+        Parameters
+        ----------
+        complete
+            A function which takes the dataframe of a model group and returns `True` if
+            the group is to be kept.
+        num_processes
+            The number of processes over which to spread the calls to `complete`. If
+            larger than 1, `complete` must be picklable, that is, defined at the top
+            level of a module and not a `lambda`.
+
         """
-        group = [
-            get_facet_by_type(self.df, "model"),
-            get_facet_by_type(self.df, "variant"),
-        ]
-        try:
-            group.append(get_facet_by_type(self.df, "grid"))
-        except ValueError:
-            pass
-        for _, grp in self.df.groupby(group):
-            if not complete(grp):
-                self.df = self.df.drop(grp.index)
+        self._materialize()
+        group = self._model_group_facets()
+        groups = [grp for _, grp in self.df.groupby(group, sort=False, observed=True)]
+        num_processes = max(min(num_processes, len(groups)), 1)
+        if num_processes > 1:
+            with Pool(num_processes) as pool:
+                incomplete = pool.map(
+                    partial(_find_incomplete, complete),
+                    [groups[i::num_processes] for i in range(num_processes)],
+                )
+        else:
+            incomplete = [_find_incomplete(complete, groups)]
+        keep = pd.Series(True, index=self.df.index)
+        for index in incomplete:
+            keep[index] = False
+        self.df = self.df[keep]
+        return self
+
+    def remove_incomplete_variables(
+        self, required: list[str], either: Union[list[str], None] = None
+    ):
+        """Remove the model groups which do not contain the given variables.
+
+        This removes the same results as `remove_incomplete()` would for the common
+        case where a model group is complete if it has certain variables, but checks
+        all model groups at once instead of calling a function on each.
+
+        Parameters
+        ----------
+        required
+            The variables which a model group must have all of.
+        either
+            The variables which a model group must have at least one of, for example
+            when several variables represent the same quantity.
+
+        """
+        self._materialize()
+        group = self._model_group_facets()
+        variables = self.df[get_facet_by_type(self.df, "variable")]
+        has = [variables == variable for variable in required]
+        if either:
+            has.append(variables.isin(either))
+        if not has:
+            return self
+        # does any row in the model group have the variable(s)? As in
+        # `remove_incomplete()`, rows missing a model group facet are not checked.
+        has = (
+            pd.concat(has, axis=1, keys=range(len(has)))
+            .groupby([self.df[g] for g in group], observed=True)
+            .transform("any")
+            .reindex(self.df.index)
+            .fillna(True)
+            .astype(bool)
+        )
+        self.df = self.df[has.all(axis=1)]
         return self
 
     def remove_ensembles(self):
@@ -743,18 +1021,32 @@ class ESGFCatalog:
         integer values) for each `source_id` in your search and remove all others.
 
         """
-        df = self.model_groups()
+        self._materialize()
         variant_facet = get_facet_by_type(self.df, "variant")
-        names = [name for name in df.index.names if name != variant_facet]
-        for lbl, grp in df.to_frame().reset_index().groupby(names):
-            variant = grp.iloc[0][variant_facet]
-            q = " & ".join([f"({n} == '{v}')" for n, v in zip(names, lbl)])
-            q += f" & ({variant_facet} != '{variant}')"
-            self.df = self.df.drop(self.df.query(q).index)
+        names = [get_facet_by_type(self.df, "model")]
+        try:
+            names.append(get_facet_by_type(self.df, "grid"))
+        except ValueError:
+            pass
+        # after a hierarchical sort of the variant integers, the first entry of each
+        # group is the smallest
+        ints = get_variant_integers(self.df[variant_facet])
+        smallest = (
+            pd.concat([self.df[names + [variant_facet]], ints], axis=1)
+            .sort_values(list(ints.columns))
+            .drop_duplicates(subset=names)
+            .drop(columns=ints.columns)
+        )
+        smallest = self.df[names].merge(smallest, how="left", on=names)[variant_facet]
+        keep = smallest.isna().to_numpy() | (
+            smallest.to_numpy() == self.df[variant_facet].to_numpy()
+        )
+        self.df = self.df[keep]
         return self
 
     def session_log(self) -> str:
         """Return the log since the instantiation of `ESGFCatalog()`."""
+        intake_esgf.conf.flush_logger()
         log = open(Path(intake_esgf.conf["logfile"]).expanduser()).readlines()[::-1]
         for n, line in enumerate(log):
             m = re.search(r"\x1b\[36;20m(.*)\s\033\[0m", line)
@@ -3,6 +3,7 @@
 import contextlib
 import copy
 import logging
+import logging.handlers
 from pathlib import Path
 from typing import Union
 
@@ -174,14 +175,24 @@ class Config(dict):
                     datefmt="%Y-%m-%d %H:%M:%S",
                 )
             )
-            file_handler.setLevel(logging.INFO)
-            logger.addHandler(file_handler)
+            # Buffer records in memory so logging does not write to the file each time,
+            # the buffer is written at the end of each operation with `flush_logger()`
+            buffer_handler = logging.handlers.MemoryHandler(
+                capacity=1024, flushLevel=logging.ERROR, target=file_handler
+            )
+            buffer_handler.setLevel(logging.INFO)
+            logger.addHandler(buffer_handler)
         logger.setLevel(logging.INFO)
 
         # This is probably wrong, but when I log from my logger it logs from parent also
         logger.parent.handlers = []
         return logger
 
+    def flush_logger(self) -> None:
+        """Write the buffered log records to the log file."""
+        for handler in logging.getLogger("intake-esgf").handlers:
+            handler.flush()
+
 
 conf = Config()
 conf.reload_all()
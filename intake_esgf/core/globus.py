@@ -16,12 +16,15 @@ from globus_sdk import (
 from globus_sdk.tokenstorage import SimpleJSONFileAdapter
 
 from intake_esgf.base import (
+    batched,
     expand_cmip5_record,
     get_content_path,
     get_dataframe_columns,
 )
 
 CLIENT_ID = "81a13009-8326-456e-a487-2d1557d8eb11"  # intake-esgf
+FILE_INFO_BATCH_SIZE = 500  # dataset_ids per file info query
+FACET_SIZE = 1000  # maximum number of values returned per facet
 
 
 class GlobusESGFIndex:
@@ -35,37 +38,41 @@ class GlobusESGFIndex:
         if index_id in GlobusESGFIndex.GLOBUS_INDEX_IDS:
             index_id = GlobusESGFIndex.GLOBUS_INDEX_IDS[index_id]
         self.index_id = index_id
+        # one client (and http session) is reused for all queries to this index, the
+        # catalog only queries an index from one thread at a time
         self.client = SearchClient()
         self.logger = None
 
     def __repr__(self):
         return self.repr
 
-    def search(self, **search: Union[str, list[str]]) -> pd.DataFrame:
-        """Search the index and return as a pandas dataframe.
-
-        This function uses the Globus `post_search()` function where our query consists
-        of a `match_any` filter for each of the keywords given in the input `search`. We
-        manually add constraints to only look for Dataset entries that are flagged as
-        the latest version. Note that this version of the index only contains CMIP6
-        entries.
-
-        """
+    def _search_query(self, **search: Union[str, list[str]]) -> SearchQuery:
+        """Return a query with a `match_any` filter for each facet in the search."""
         # the ALCF index encodes booleans as strings
         if "anl-dev" in self.repr:
             for key, val in search.items():
                 if isinstance(val, bool):
                     search[key] = str(val)
-
-        # build up the query and search
         query_data = SearchQuery("")
         for key, val in search.items():
             query_data.add_filter(
                 key, val if isinstance(val, list) else [val], type="match_any"
             )
+        return query_data
+
+    def search(self, **search: Union[str, list[str]]) -> pd.DataFrame:
+        """Search the index and return as a pandas dataframe.
+
+        This function uses the Globus `post_search()` function where our query consists
+        of a `match_any` filter for each of the keywords given in the input `search`. We
+        manually add constraints to only look for Dataset entries that are flagged as
+        the latest version. Note that this version of the index only contains CMIP6
+        entries.
+
+        """
+        query_data = self._search_query(**search)
         response_time = time.time()
-        sc = SearchClient()
-        paginator = sc.paginated.post_search(self.index_id, query_data)
+        paginator = self.client.paginated.post_search(self.index_id, query_data)
         paginator.limit = 1000
         df = []
         for response in paginator:
@@ -100,49 +107,90 @@ class GlobusESGFIndex:
             self.logger.info(f"└─{self} results={len(df)} {response_time=:.2f}")
         return df
 
-    def get_file_info(self, dataset_ids: list[str], **facets) -> dict[str, Any]:
-        """Get file information for the given datasets."""
+    def facet_counts(
+        self, **search: Union[str, list[str]]
+    ) -> dict[str, dict[str, int]]:
+        """Return the counts of each facet value in the search without the records.
+
+        A single record is requested to learn which facets the project uses and then
+        the counts of these facets are requested with no records.
+
+        """
         response_time = time.time()
-        sc = SearchClient()
-        query = (
-            SearchQuery("")
-            .add_filter("type", ["File"])
-            .add_filter("dataset_id", dataset_ids, type="match_any")
+        response = self.client.post_search(
+            self.index_id, self._search_query(**search).set_limit(1)
         )
-        for facet, val in facets.items():
-            query.add_filter(
-                facet, val if isinstance(val, list) else [val], type="match_any"
-            )
-        paginator = sc.paginated.post_search(self.index_id, query)
-        paginator.limit = 1000
+        if not response["gmeta"]:
+            return {}
+        content = response["gmeta"][0]["entries"][0]["content"]
+        facets = [
+            facet
+            for facet in get_dataframe_columns(content)
+            if facet not in ["version", "data_node"]
+        ]
+        query_data = self._search_query(**search).set_limit(0)
+        for facet in facets:
+            query_data.add_facet(facet, facet, size=FACET_SIZE)
+        response = self.client.post_search(self.index_id, query_data)
+        counts = {
+            fr["name"]: {bucket["value"]: bucket["count"] for bucket in fr["buckets"]}
+            for fr in response["facet_results"]
+        }
+        response_time = time.time() - response_time
+        if self.logger is not None:
+            self.logger.info(f"└─{self} facets={len(counts)} {response_time=:.2f}")
+        return counts
+
+    def get_file_info(self, dataset_ids: list[str], **facets) -> dict[str, Any]:
+        """Get file information for the given datasets.
+
+        Dataset ids are queried in batches using a `match_any` filter and the client
+        created with the index is reused, so no connections are setup per dataset.
+
+        """
+        response_time = time.time()
         infos = []
-        for response in paginator:
-            for g in response.get("gmeta"):
-                assert len(g["entries"]) == 1
-                content = g["entries"][0]["content"]
-                info = {
-                    "dataset_id": content["dataset_id"],
-                    "checksum_type": content["checksum_type"][0],
-                    "checksum": content["checksum"][0],
-                    "size": content["size"],
-                    "HTTPServer": [
-                        url.split("|")[0]
-                        for url in content["url"]
-                        if "HTTPServer" in url
-                    ],
-                    "Globus": [
-                        url.split("|")[0] for url in content["url"] if "Globus" in url
-                    ],
-                }
-                info["path"] = get_content_path(content)
-                infos.append(info)
+        for dataset_id_batch in batched(dataset_ids, FILE_INFO_BATCH_SIZE):
+            query = (
+                SearchQuery("")
+                .add_filter("type", ["File"])
+                .add_filter("dataset_id", dataset_id_batch, type="match_any")
+            )
+            for facet, val in facets.items():
+                query.add_filter(
+                    facet, val if isinstance(val, list) else [val], type="match_any"
+                )
+            paginator = self.client.paginated.post_search(self.index_id, query)
+            paginator.limit = 1000
+            for response in paginator:
+                for g in response.get("gmeta"):
+                    assert len(g["entries"]) == 1
+                    content = g["entries"][0]["content"]
+                    info = {
+                        "dataset_id": content["dataset_id"],
+                        "checksum_type": content["checksum_type"][0],
+                        "checksum": content["checksum"][0],
+                        "size": content["size"],
+                        "HTTPServer": [
+                            url.split("|")[0]
+                            for url in content["url"]
+                            if "HTTPServer" in url
+                        ],
+                        "Globus": [
+                            url.split("|")[0]
+                            for url in content["url"]
+                            if "Globus" in url
+                        ],
+                    }
+                    info["path"] = get_content_path(content)
+                    infos.append(info)
         response_time = time.time() - response_time
         if self.logger is not None:
             self.logger.info(f"└─{self} results={len(infos)} {response_time=:.2f}")
         return infos
 
     def from_tracking_ids(self, tracking_ids: list[str]) -> pd.DataFrame:
-        response = SearchClient().post_search(
+        response = self.client.post_search(
             self.index_id,
             SearchQuery("").add_filter("tracking_id", tracking_ids, type="match_any"),
         )
@@ -176,7 +224,8 @@ def variable_info(query: str, project: str = "CMIP6") -> pd.DataFrame:
         .add_facet("variable", "variable")
         .set_limit(0)
     )
-    response = SearchClient().post_search("ea4595f4-7b71-4da7-a1f0-e3f5d8f7f062", q)
+    client = SearchClient()
+    response = client.post_search("ea4595f4-7b71-4da7-a1f0-e3f5d8f7f062", q)
     variables = list(
         set(
             [
@@ -200,7 +249,7 @@ def variable_info(query: str, project: str = "CMIP6") -> pd.DataFrame:
             .add_filter(var_facet, [v])  # need to abstract this
             .set_limit(1)
         )
-        response = SearchClient().post_search("ea4595f4-7b71-4da7-a1f0-e3f5d8f7f062", q)
+        response = client.post_search("ea4595f4-7b71-4da7-a1f0-e3f5d8f7f062", q)
         for doc in response.get("gmeta"):
             content = doc["entries"][0]["content"]
             columns = [var_facet]
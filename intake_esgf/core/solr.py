@@ -7,12 +7,18 @@ import pandas as pd
 import requests
 
 from intake_esgf.base import (
+    batched,
     expand_cmip5_record,
     get_content_path,
     get_dataframe_columns,
 )
 from intake_esgf.exceptions import NoSearchResults
 
+# dataset_ids are sent as query parameters, so we limit how many go in a single request
+# to keep the url length reasonable
+FILE_INFO_BATCH_SIZE = 50
+FILE_INFO_PAGE_SIZE = 1000
+
 
 def esg_search(base_url, **search):
     """Yields paginated responses using the ESGF REST API."""
@@ -77,6 +83,49 @@ class SolrESGFIndex:
             self.logger.info(f"└─{self} results={len(df)} {total_time=:.2f}")
         return df
 
+    def facet_counts(
+        self, **search: Union[str, list[str]]
+    ) -> dict[str, dict[str, int]]:
+        """Return the counts of each facet value in the search without the records.
+
+        A single record is requested to learn which facets the project uses and then
+        the counts of these facets are requested with no records.
+
+        """
+        search["distrib"] = search["distrib"] if "distrib" in search else self.distrib
+        search["format"] = "application/solr+json"
+        total_time = time.time()
+        response = requests.get(
+            f"{self.url}/esg-search/search", params=dict(search, limit=1)
+        )
+        response.raise_for_status()
+        response = response.json()["response"]
+        if not response["numFound"]:
+            if self.logger is not None:
+                self.logger.info(f"└─{self} no results")
+            raise NoSearchResults
+        facets = [
+            facet
+            for facet in get_dataframe_columns(response["docs"][0])
+            if facet not in ["version", "data_node"]
+        ]
+        response = requests.get(
+            f"{self.url}/esg-search/search",
+            params=dict(search, limit=0, facets=",".join(facets)),
+        )
+        response.raise_for_status()
+        fields = response.json()["facet_counts"]["facet_fields"]
+        # solr returns the values and counts interleaved in a single list
+        counts = {
+            facet: dict(zip(fields[facet][::2], fields[facet][1::2]))
+            for facet in facets
+            if facet in fields
+        }
+        total_time = time.time() - total_time
+        if self.logger is not None:
+            self.logger.info(f"└─{self} facets={len(counts)} {total_time=:.2f}")
+        return counts
+
     def from_tracking_ids(self, tracking_ids: list[str]) -> pd.DataFrame:
         total_time = time.time()
         df = []
@@ -108,29 +157,32 @@ class SolrESGFIndex:
             latest=True,
             retracted=False,
             distrib=self.distrib,
-            dataset_id=dataset_ids,
+            limit=FILE_INFO_PAGE_SIZE,
         )
         search.update(facets)
         infos = []
-        for response in esg_search(self.url, **search):
-            response = response["response"]
-            if not response["numFound"]:
-                if self.logger is not None:
-                    self.logger.info(f"└─{self} no results")
-                raise NoSearchResults
-            for doc in response["docs"]:
-                info = {}
-                info["dataset_id"] = doc["dataset_id"]
-                info["checksum_type"] = doc["checksum_type"][0]
-                info["checksum"] = doc["checksum"][0]
-                info["size"] = doc["size"]
-                info["path"] = get_content_path(doc)
-                for entry in doc["url"]:
-                    link, _, link_type = entry.split("|")
-                    if link_type not in info:
-                        info[link_type] = []
-                    info[link_type].append(link)
-                infos.append(info)
+        for dataset_id_batch in batched(dataset_ids, FILE_INFO_BATCH_SIZE):
+            search["dataset_id"] = dataset_id_batch
+            for response in esg_search(self.url, **search):
+                response = response["response"]
+                for doc in response["docs"]:
+                    info = {}
+                    info["dataset_id"] = doc["dataset_id"]
+                    info["checksum_type"] = doc["checksum_type"][0]
+                    info["checksum"] = doc["checksum"][0]
+                    info["size"] = doc["size"]
+                    info["path"] = get_content_path(doc)
+                    for entry in doc["url"]:
+                        link, _, link_type = entry.split("|")
+                        if link_type not in info:
+                            info[link_type] = []
+                        info[link_type].append(link)
+                    infos.append(info)
+        total_time = time.time() - total_time
+        if not infos:
+            if self.logger is not None:
+                self.logger.info(f"└─{self} no results")
+            raise NoSearchResults
         if self.logger is not None:
             self.logger.info(f"└─{self} results={len(infos)} {total_time=:.2f}")
         return infos
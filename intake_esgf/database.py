@@ -1,12 +1,16 @@
 """Database functions which interact with SQLite."""
 
+import json
 import sqlite3
 from pathlib import Path
-from typing import Literal
+from typing import Any, Literal
 
 import numpy as np
 import pandas as pd
 
+# Keep the number of bound variables per statement below the SQLite limit
+SQLITE_BATCH_SIZE = 500
+
 
 def create_download_database(path: Path) -> None:
     """Create a SQLite database for logging downloading information.
@@ -126,3 +130,105 @@ def sort_globus_endpoints(uuid: str, df_rate: pd.DataFrame) -> float:
     if uuid not in df_rate.index:
         return df_rate["rate"].max() + np.random.rand(1)[0]
     return df_rate.loc[uuid, "rate"]
+
+
+def create_file_info_table(path: Path) -> None:
+    """Add a table for caching file information to the SQLite database.
+
+    Parameters
+    ----------
+    path
+        The full path of the database file.
+
+    """
+    with sqlite3.connect(path) as con:
+        cur = con.cursor()
+        cur.execute(
+            "CREATE TABLE IF NOT EXISTS file_info(timestamp TEXT NULL DEFAULT (datetime('now', 'localtime')), dataset_id, query, info)"
+        )
+        cur.execute(
+            "CREATE INDEX IF NOT EXISTS file_info_query ON file_info(query, dataset_id)"
+        )
+
+
+def get_cached_file_info(
+    path: Path, dataset_ids: list[str], query: str, max_age: float = 7
+) -> dict[str, list[dict[str, Any]]]:
+    """Return the cached file information for the given datasets.
+
+    Parameters
+    ----------
+    path
+        The full path of the database file.
+    dataset_ids
+        The datasets whose file information we want.
+    query
+        The additional facets used in the file information query.
+    max_age
+        The age in days after which cached information is removed.
+
+    """
+    with sqlite3.connect(path) as con:
+        cur = con.cursor()
+        cur.execute(
+            "DELETE FROM file_info WHERE timestamp < datetime('now', ?, 'localtime')",
+            (f"-{max_age} day",),
+        )
+        con.commit()
+        rows = []
+        for i in range(0, len(dataset_ids), SQLITE_BATCH_SIZE):
+            batch = dataset_ids[i : i + SQLITE_BATCH_SIZE]
+            rows += cur.execute(
+                "SELECT dataset_id, info FROM file_info WHERE query = ? "
+                f"AND dataset_id IN ({','.join('?' * len(batch))})",
+                (query, *batch),
+            ).fetchall()
+    cached = {}
+    for dataset_id, info in rows:
+        infos = json.loads(info)
+        for info in infos:
+            info["path"] = Path(info["path"])
+        cached[dataset_id] = infos
+    return cached
+
+
+def cache_file_info(
+    path: Path, infos: dict[str, list[dict[str, Any]]], query: str
+) -> None:
+    """Store the file information of datasets in the database.
+
+    Parameters
+    ----------
+    path
+        The full path of the database file.
+    infos
+        The file information of each dataset.
+    query
+        The additional facets used in the file information query.
+
+    """
+    with sqlite3.connect(path) as con:
+        cur = con.cursor()
+        cur.executemany(
+            "INSERT INTO file_info ('dataset_id','query','info') VALUES (?,?,?)",
+            [
+                (dataset_id, query, json.dumps(info, default=str))
+                for dataset_id, info in infos.items()
+            ],
+        )
+        con.commit()
+
+
+def clear_file_info(path: Path) -> None:
+    """Remove all cached file information from the database.
+
+    Parameters
+    ----------
+    path
+        The full path of the database file.
+
+    """
+    with sqlite3.connect(path) as con:
+        cur = con.cursor()
+        cur.execute("DELETE FROM file_info")
+        con.commit()
@@ -1,6 +1,11 @@
+import sqlite3
+
+import pytest
+
 import intake_esgf
 from intake_esgf import ESGFCatalog
-from intake_esgf.exceptions import NoSearchResults
+from intake_esgf.core import SolrESGFIndex
+from intake_esgf.exceptions import NoSearchResults, SearchError
 
 SOLR_TEST = "esgf-node.llnl.gov"
 
@@ -19,6 +24,58 @@ def test_search():
         assert "sftlf" in ds["gpp"]
 
 
+def test_shallow_search():
+    cat = ESGFCatalog().search(
+        shallow=True,
+        experiment_id="historical",
+        source_id="CanESM5",
+        variable_id=["gpp", "tas"],
+        variant_label=["r1i1p1f1"],
+    )
+    assert cat.df is None
+    assert set(cat.unique()["variable_id"]) == set(["gpp", "tas"])
+    assert len(cat.model_groups()) == 1
+    assert cat.df is not None
+
+
+def test_search_cache():
+    search = dict(
+        experiment_id="historical",
+        source_id="CanESM5",
+        variable_id="gpp",
+        variant_label="r1i1p1f1",
+    )
+    cat = ESGFCatalog().clear_cache()
+    n = len(cat.search(**search).df)
+    assert "cached" not in cat.session_log()
+    assert len(cat.search(**search).df) == n
+    assert "cached" in cat.session_log()
+
+
+def test_file_info_cache():
+    search = dict(
+        experiment_id="historical",
+        source_id="CanESM5",
+        variable_id="gpp",
+        variant_label="r1i1p1f1",
+        frequency="mon",
+    )
+    cat = ESGFCatalog().clear_cache().search(**search)
+    num_ids = sum(len(ids) for ids in cat.df["id"])  # includes replicas
+    cat.to_dataset_dict(add_measures=False)
+    assert f"file info cached for {num_ids} datasets" not in cat.session_log()
+    cat.to_dataset_dict(add_measures=False)
+    assert f"file info cached for {num_ids} datasets" in cat.session_log()
+
+    # nothing is cached when an index fails to respond
+    cat = ESGFCatalog().clear_cache().search(**search)
+    cat.indices.append(SolrESGFIndex("esgf-node.invalid"))
+    with pytest.warns(UserWarning):
+        cat.to_dataset_dict(add_measures=False)
+    with sqlite3.connect(cat.download_db) as con:
+        assert con.execute("SELECT COUNT(*) FROM file_info").fetchone()[0] == 0
+
+
 def test_esgroot():
     with intake_esgf.conf.set(esg_dataroot=intake_esgf.conf["local_cache"]):
         cat = ESGFCatalog().search(
@@ -82,6 +139,74 @@ def test_modelgroups():
     assert len(cat.model_groups()) == 4
 
 
+def has_gpp_and_lai(df):
+    # defined at the module level so that it may be pickled for `num_processes>1`
+    return not set(["gpp", "lai"]).difference(df.variable_id.unique())
+
+
+def test_remove_incomplete_processes():
+    cat = ESGFCatalog().search(
+        experiment_id="historical",
+        source_id=["CanESM5", "UKESM1-0-LL"],
+        variable_id=["gpp", "lai", "nbp"],
+        frequency="mon",
+    )
+    df = cat.df.copy()
+    cat.remove_incomplete(has_gpp_and_lai)
+    cat_procs = ESGFCatalog()
+    cat_procs.df = df.copy()
+    cat_procs.remove_incomplete(has_gpp_and_lai, num_processes=2)
+    assert len(cat.df) < len(df)
+    assert set(cat.df.index) == set(cat_procs.df.index)
+
+
+def test_remove_incomplete_variables():
+    def complete(df):
+        if set(["gpp", "lai"]).difference(df.variable_id.unique()):
+            return False
+        return df.variable_id.isin(["nbp", "netAtmosLandCO2Flux"]).any()
+
+    search = dict(
+        experiment_id="historical",
+        source_id=["CanESM5", "UKESM1-0-LL"],
+        variable_id=["gpp", "lai", "nbp", "netAtmosLandCO2Flux"],
+        frequency="mon",
+    )
+    cat = ESGFCatalog().search(**search)
+    df = cat.df.copy()
+    cat.remove_incomplete(complete)
+    # compare on the same results, the row order of separate searches may differ
+    cat_vars = ESGFCatalog()
+    cat_vars.df = df.copy()
+    cat_vars.remove_incomplete_variables(
+        ["gpp", "lai"], either=["nbp", "netAtmosLandCO2Flux"]
+    )
+    assert len(cat_vars.df) < len(df)
+    assert set(cat.df.index) == set(cat_vars.df.index)
+
+
+def test_search_require_variables():
+    search = dict(
+        experiment_id="historical",
+        source_id=["CanESM5", "UKESM1-0-LL"],
+        frequency="mon",
+    )
+    cat = ESGFCatalog().search(
+        variable_id=["gpp", "lai", "nbp", "netAtmosLandCO2Flux"], **search
+    )
+    cat.remove_incomplete_variables(
+        ["gpp", "lai"], either=["nbp", "netAtmosLandCO2Flux"]
+    )
+    cat_search = ESGFCatalog().search(
+        require_variables=["gpp", "lai"],
+        either_variables=["nbp", "netAtmosLandCO2Flux"],
+        **search,
+    )
+    assert len(cat_search.df) == len(cat.df)
+    with pytest.raises(SearchError):
+        ESGFCatalog().search(shallow=True, require_variables=["gpp"], **search)
+
+
 def test_remove_ensemble():
     cat = ESGFCatalog().search(
         experiment_id="historical",
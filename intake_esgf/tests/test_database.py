@@ -0,0 +1,58 @@
+import sqlite3
+from pathlib import Path
+
+from intake_esgf.database import (
+    SQLITE_BATCH_SIZE,
+    cache_file_info,
+    clear_file_info,
+    create_file_info_table,
+    get_cached_file_info,
+)
+
+
+def file_infos(dataset_ids: list[str]) -> dict:
+    return {
+        dataset_id: [
+            {
+                "dataset_id": dataset_id,
+                "path": Path(f"CMIP6/{dataset_id}/file.nc"),
+                "HTTPServer": [f"https://esgf.node/{dataset_id}/file.nc"],
+            }
+        ]
+        for dataset_id in dataset_ids
+    }
+
+
+def test_file_info_cache(tmp_path):
+    db = tmp_path / "download.db"
+    create_file_info_table(db)
+    ids = [f"dataset{i}" for i in range(2 * SQLITE_BATCH_SIZE + 10)]
+    infos = file_infos(ids)
+    cache_file_info(db, infos, "query")
+
+    # round-trip over several batches, paths come back as Path
+    cached = get_cached_file_info(db, ids + ["not_cached"], "query")
+    assert cached == infos
+    assert isinstance(cached["dataset0"][0]["path"], Path)
+
+    # a different query does not use the cache
+    assert not get_cached_file_info(db, ids, "other query")
+
+    # clearing removes everything
+    clear_file_info(db)
+    assert not get_cached_file_info(db, ids, "query")
+
+
+def test_file_info_cache_expiry(tmp_path):
+    db = tmp_path / "download.db"
+    create_file_info_table(db)
+    cache_file_info(db, file_infos(["old", "new"]), "query")
+    with sqlite3.connect(db) as con:
+        for dataset_id, age in [("old", 8), ("new", 2)]:
+            con.execute(
+                "UPDATE file_info SET timestamp = datetime('now', ?, 'localtime') "
+                "WHERE dataset_id = ?",
+                (f"-{age} day", dataset_id),
+            )
+    assert list(get_cached_file_info(db, ["old", "new"], "query")) == ["new"]
+    assert not get_cached_file_info(db, ["new"], "query", max_age=1)